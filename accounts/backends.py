@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+# Authentication backend that loads the user's bank account along with the user
+
+
+class UserBankAccountBackend(ModelBackend):
+    def get_user(self, user_id):
+        # Join the account so request.user.account doesn't need its own query
+        try:
+            user = UserModel._default_manager.select_related(
+                'account').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
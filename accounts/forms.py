@@ -1,10 +1,19 @@
 # Import necessary modules and classes from Django
 from django import forms
+from django.db import transaction
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from .constants import GENDER_TYPE, ACCOUNT_TYPE
 from .models import UserBankAccount, UserAddress
 
+# CSS classes applied to every form field for styling
+FIELD_CLASS = (
+    'appearance-none block w-full bg-gray-200 '
+    'text-gray-700 border border-gray-200 rounded '
+    'py-3 px-4 leading-tight focus:outline-none '
+    'focus:bg-white focus:border-gray-500'
+)
+
 # Form for user registration, inherits from UserCreationForm
 
 
@@ -29,45 +38,43 @@ class UserRegistrationForm(UserCreationForm):
         # Save the user instance
         our_user = super().save(commit=False)
         if commit:
-            our_user.save()
-            # Retrieve additional data from the form
-            account_type = self.cleaned_data.get('account_type')
-            gender = self.cleaned_data.get('gender')
-            postal_code = self.cleaned_data.get('postal_code')
-            country = self.cleaned_data.get('country')
-            birth_date = self.cleaned_data.get('birth_date')
-            city = self.cleaned_data.get('city')
-            street_address = self.cleaned_data.get('street_address')
-
-            # Create UserAddress and UserBankAccount instances
-            UserAddress.objects.create(
-                user=our_user,
-                postal_code=postal_code,
-                country=country,
-                city=city,
-                street_address=street_address
-            )
-            UserBankAccount.objects.create(
-                user=our_user,
-                account_type=account_type,
-                gender=gender,
-                birth_date=birth_date,
-                account_no=100000 + our_user.id
-            )
+            with transaction.atomic():
+                our_user.save()
+                # Retrieve additional data from the form
+                account_type = self.cleaned_data.get('account_type')
+                gender = self.cleaned_data.get('gender')
+                postal_code = self.cleaned_data.get('postal_code')
+                country = self.cleaned_data.get('country')
+                birth_date = self.cleaned_data.get('birth_date')
+                city = self.cleaned_data.get('city')
+                street_address = self.cleaned_data.get('street_address')
+
+                # Create UserAddress and UserBankAccount instances
+                UserAddress.objects.bulk_create([
+                    UserAddress(
+                        user=our_user,
+                        postal_code=postal_code,
+                        country=country,
+                        city=city,
+                        street_address=street_address
+                    )
+                ])
+                UserBankAccount.objects.bulk_create([
+                    UserBankAccount(
+                        user=our_user,
+                        account_type=account_type,
+                        gender=gender,
+                        birth_date=birth_date,
+                        account_no=100000 + our_user.id
+                    )
+                ])
         return our_user
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Add CSS classes to form fields for styling
-        for field in self.fields:
-            self.fields[field].widget.attrs.update({
-                'class': (
-                    'appearance-none block w-full bg-gray-200 '
-                    'text-gray-700 border border-gray-200 rounded '
-                    'py-3 px-4 leading-tight focus:outline-none '
-                    'focus:bg-white focus:border-gray-500'
-                )
-            })
+        for field in self.fields.values():
+            field.widget.attrs['class'] = FIELD_CLASS
 
 # Form for updating user information, inherits from forms.ModelForm
 
@@ -90,15 +97,8 @@ class UserUpdateForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Add CSS classes to form fields for styling
-        for field in self.fields:
-            self.fields[field].widget.attrs.update({
-                'class': (
-                    'appearance-none block w-full bg-gray-200 '
-                    'text-gray-700 border border-gray-200 rounded '
-                    'py-3 px-4 leading-tight focus:outline-none '
-                    'focus:bg-white focus:border-gray-500'
-                )
-            })
+        for field in self.fields.values():
+            field.widget.attrs['class'] = FIELD_CLASS
         # If the user instance exists, retrieve related UserBankAccount and UserAddress data
         if self.instance:
             try:
@@ -121,24 +121,26 @@ class UserUpdateForm(forms.ModelForm):
     def save(self, commit=True):
         user = super().save(commit=False)
         if commit:
-            user.save()
-
-            # Retrieve or create UserBankAccount and UserAddress instances
-            user_account, created = UserBankAccount.objects.get_or_create(
-                user=user)
-            user_address, created = UserAddress.objects.get_or_create(
-                user=user)
-
-            # Update fields based on form data
-            user_account.account_type = self.cleaned_data['account_type']
-            user_account.gender = self.cleaned_data['gender']
-            user_account.birth_date = self.cleaned_data['birth_date']
-            user_account.save()
-
-            user_address.street_address = self.cleaned_data['street_address']
-            user_address.city = self.cleaned_data['city']
-            user_address.postal_code = self.cleaned_data['postal_code']
-            user_address.country = self.cleaned_data['country']
-            user_address.save()
+            with transaction.atomic():
+                user.save()
+
+                # Update or create UserBankAccount and UserAddress instances from form data
+                UserBankAccount.objects.update_or_create(
+                    user=user,
+                    defaults={
+                        'account_type': self.cleaned_data['account_type'],
+                        'gender': self.cleaned_data['gender'],
+                        'birth_date': self.cleaned_data['birth_date'],
+                    }
+                )
+                UserAddress.objects.update_or_create(
+                    user=user,
+                    defaults={
+                        'street_address': self.cleaned_data['street_address'],
+                        'city': self.cleaned_data['city'],
+                        'postal_code': self.cleaned_data['postal_code'],
+                        'country': self.cleaned_data['country'],
+                    }
+                )
 
         return user
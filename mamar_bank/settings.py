@@ -132,6 +132,13 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Authentication backends
+# UserBankAccountBackend preloads request.user.account
+
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.UserBankAccountBackend',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -72,9 +72,10 @@ class TransferRequestForm(TransactionForm):
 
     def clean_account_no(self):
         receiver_account = self.cleaned_data.get('account_no')
-        data_exist = UserBankAccount.objects.filter(
-            account_no=receiver_account).exists()
-        if not data_exist:
+        # Keep the receiver (with its user) so the view doesn't query it again
+        self.receiver_account = UserBankAccount.objects.select_related('user').filter(
+            account_no=receiver_account).first()
+        if self.receiver_account is None:
             raise forms.ValidationError(
                 f'Account does not exist'
             )
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-15 21:47
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_transaction_transaction_account_9b28bc_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='transaction',
+            options={},
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+# Moves money between two accounts in one call: locks both rows in id order,
+# debits the sender only if the balance covers it, then credits the receiver.
+# Either failure raises check_violation and rolls the whole call back.
+CREATE_TRANSFER_BALANCE = """
+CREATE OR REPLACE FUNCTION transfer_balance(sender_id BIGINT, receiver_id BIGINT, amt NUMERIC)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM 1 FROM accounts_userbankaccount
+        WHERE id IN (sender_id, receiver_id) ORDER BY id FOR UPDATE;
+    UPDATE accounts_userbankaccount SET balance = balance - amt
+        WHERE id = sender_id AND balance >= amt;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'insufficient balance' USING ERRCODE = 'check_violation';
+    END IF;
+    UPDATE accounts_userbankaccount SET balance = balance + amt
+        WHERE id = receiver_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'receiver account does not exist' USING ERRCODE = 'check_violation';
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+DROP_TRANSFER_BALANCE = "DROP FUNCTION IF EXISTS transfer_balance(BIGINT, BIGINT, NUMERIC);"
+
+
+def create_transfer_balance(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_TRANSFER_BALANCE)
+
+
+def drop_transfer_balance(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRANSFER_BALANCE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('transactions', '0007_alter_transaction_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_transfer_balance, drop_transfer_balance),
+    ]
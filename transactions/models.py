@@ -16,4 +16,7 @@ class Transaction(models.Model):
     loan_approve = models.BooleanField(default=False)
 
     class Meta:
-        ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['account', 'timestamp']),
+            models.Index(fields=['account', 'transaction_type', 'loan_approve']),
+        ]
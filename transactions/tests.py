@@ -1,3 +1,49 @@
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
 
+from accounts.models import UserBankAccount
+from transactions.views import transfer_balance
+
 # Create your tests here.
+
+
+@skipUnless(connection.vendor == 'postgresql', 'transfer_balance() is a PostgreSQL function')
+class TransferBalanceTests(TestCase):
+    def setUp(self):
+        self.sender = UserBankAccount.objects.create(
+            user=User.objects.create_user('sender'), account_type='Savings',
+            gender='Male', account_no=100001, balance=Decimal('1000.00'))
+        self.receiver = UserBankAccount.objects.create(
+            user=User.objects.create_user('receiver'), account_type='Savings',
+            gender='Female', account_no=100002, balance=Decimal('200.00'))
+
+    def assertBalances(self, sender_balance, receiver_balance):
+        self.sender.refresh_from_db()
+        self.receiver.refresh_from_db()
+        self.assertEqual(self.sender.balance, Decimal(sender_balance))
+        self.assertEqual(self.receiver.balance, Decimal(receiver_balance))
+
+    def test_transfer_moves_amount(self):
+        self.assertTrue(transfer_balance(
+            self.sender, self.receiver, Decimal('600.00')))
+        self.assertBalances('400.00', '800.00')
+
+    def test_transfer_whole_balance(self):
+        self.assertTrue(transfer_balance(
+            self.sender, self.receiver, Decimal('1000.00')))
+        self.assertBalances('0.00', '1200.00')
+
+    def test_insufficient_balance_changes_nothing(self):
+        self.assertFalse(transfer_balance(
+            self.sender, self.receiver, Decimal('1000.01')))
+        self.assertBalances('1000.00', '200.00')
+
+    def test_missing_receiver_changes_nothing(self):
+        missing = UserBankAccount(pk=self.receiver.pk + 1000)
+        self.assertFalse(transfer_balance(
+            self.sender, missing, Decimal('600.00')))
+        self.assertBalances('1000.00', '200.00')
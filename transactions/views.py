@@ -10,21 +10,66 @@ from transactions.forms import DepositForm, LoanRequestForm, WithdrawForm, Trans
 from .constants import DEPOSIT, LOAN, LOAN_PAID, WITHDRAWAL, TRANSFER
 from accounts.models import UserBankAccount
 from django.http import HttpResponse
+import logging
 from datetime import datetime
-from django.db.models import Sum
-from django.core.mail import EmailMultiAlternatives
+from concurrent.futures import ThreadPoolExecutor
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 
 
+logger = logging.getLogger(__name__)
+
+# Background workers for delivering emails so the response doesn't wait on SMTP
+email_executor = ThreadPoolExecutor(max_workers=2)
+
+
+def log_email_failure(future):
+    # The request has already returned, so a failed send can only be logged
+    exception = future.exception()
+    if exception is not None:
+        logger.error('Failed to send transaction email', exc_info=exception)
+
+
+def submit_email(send, *args):
+    future = email_executor.submit(send, *args)
+    future.add_done_callback(log_email_failure)
+
+
+# Columns the transaction report renders, the rest are left deferred
+REPORT_FIELDS = (
+    'amount', 'balance_after_transaction', 'transaction_type', 'timestamp',
+)
+
 # Create your views here.
-def send_transaction_email(user, amount, subject, template):
+def build_transaction_email(user, amount, subject, template):
+    # Render on the request thread (it reads the database), only the send is offloaded
     message = render_to_string(template, {
         'user': user,
         'amount': amount,
     })
     send_email = EmailMultiAlternatives(subject, '', to=[user.email])
     send_email.attach_alternative(message, "text/html")
-    send_email.send()
+    return send_email
+
+
+def send_transaction_email(user, amount, subject, template):
+    send_email = build_transaction_email(user, amount, subject, template)
+    submit_email(send_email.send)
+
+
+def transfer_balance(sender_account, receiver_account, amount):
+    # One round-trip to the transfer_balance() function from migration 0008.
+    # Returns False without changing anything if the sender can't cover the amount
+    # or the receiver no longer exists
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SELECT transfer_balance(%s, %s, %s)', [
+                           sender_account.pk, receiver_account.pk, amount])
+    except IntegrityError:
+        return False
+    return True
 
 # Define a mixin class for creating transactions with common functionality
 
@@ -63,14 +108,17 @@ class DepositMoneyView(TransactionCreateMixin):
     # Override form_valid to handle form submission for deposit
     def form_valid(self, form):
         amount = form.cleaned_data.get('amount')
+        amount_str = f'{amount:,.2f}'
         account = self.request.user.account
-        account.balance += amount
-        account.save(update_fields=['balance'])
+        # Let the database do the arithmetic so concurrent deposits don't race
+        UserBankAccount.objects.filter(pk=account.pk).update(
+            balance=F('balance') + amount)
+        account.refresh_from_db(fields=['balance'])
 
         messages.success(
-            self.request, f'{"{:,.2f}".format(float(amount))} $ was deposited to your account successfully.'
+            self.request, f'{amount_str} $ was deposited to your account successfully.'
         )
-        send_transaction_email(self.request.user, amount,
+        send_transaction_email(self.request.user, amount_str,
                                "Deposite Message", "transactions/deposite_email.html")
 
         return super().form_valid(form)
@@ -89,15 +137,23 @@ class WithdrawMoneyView(TransactionCreateMixin):
     # Override form_valid to handle form submission for withdrawal
     def form_valid(self, form):
         amount = form.cleaned_data.get('amount')
+        amount_str = f'{amount:,.2f}'
 
-        self.request.user.account.balance -= amount
-        self.request.user.account.save(update_fields=['balance'])
+        account = self.request.user.account
+        # Debit only if the balance still covers the amount, checked by the database
+        withdrawn = UserBankAccount.objects.filter(
+            pk=account.pk, balance__gte=amount).update(balance=F('balance') - amount)
+        if not withdrawn:
+            form.add_error(
+                'amount', 'You cannot withdraw more than your account balance.')
+            return self.form_invalid(form)
+        account.refresh_from_db(fields=['balance'])
 
         messages.success(
             self.request,
-            f'Successfully withdrawn {"{:,.2f}".format(float(amount))}$ from your account'
+            f'Successfully withdrawn {amount_str}$ from your account'
         )
-        send_transaction_email(self.request.user, amount,
+        send_transaction_email(self.request.user, amount_str,
                                "Withdrawl Message", "transactions/withdrawal_email.html")
         return super().form_valid(form)
 
@@ -115,13 +171,16 @@ class LoanRequestView(TransactionCreateMixin):
     # Override form_valid to handle form submission for loan request
     def form_valid(self, form):
         amount = form.cleaned_data.get('amount')
+        amount_str = f'{amount:,.2f}'
+        # Only the first 3 approved loans are needed to decide, so bound the count
         current_loan_count = Transaction.objects.filter(
-            account=self.request.user.account, transaction_type=3, loan_approve=True).count()
+            account=self.request.user.account, transaction_type=3, loan_approve=True
+        ).order_by().values_list('id', flat=True)[:3].count()
         if current_loan_count >= 3:
             return HttpResponse("You have crossed the loan limit")
         messages.success(
-            self.request, f'Loan request for {"{:,.2f}".format(float(amount))}$ submitted successfully')
-        send_transaction_email(self.request.user, amount,
+            self.request, f'Loan request for {amount_str}$ submitted successfully')
+        send_transaction_email(self.request.user, amount_str,
                                "Loan Request Message", "transactions/loan_request.html")
         return super().form_valid(form)
 
@@ -130,11 +189,13 @@ class LoanRequestView(TransactionCreateMixin):
 class TransactionReportView(LoginRequiredMixin, ListView):
     template_name = 'transactions/transaction_report.html'
     model = Transaction
+    paginate_by = 50  # only one page of transactions is fetched per request
     balance = 0  # to store the balance to be displayed in the template
 
     # Override get_queryset to filter and customize the queryset
     def get_queryset(self):
-        queryset = super().get_queryset().filter(account=self.request.user.account)
+        queryset = Transaction.objects.only(*REPORT_FIELDS).filter(
+            account=self.request.user.account).order_by('-timestamp')
         start_date_str = self.request.GET.get('start_date')
         end_date_str = self.request.GET.get('end_date')
 
@@ -147,13 +208,13 @@ class TransactionReportView(LoginRequiredMixin, ListView):
                 timestamp__date__gte=start_date, timestamp__date__lte=end_date)
 
             # Calculate the total balance for the specified date range
-            self.balance = Transaction.objects.filter(
-                timestamp__date__gte=start_date, timestamp__date__lte=end_date).aggregate(Sum('amount'))['amount__sum']
+            self.balance = queryset.aggregate(
+                total=Sum('amount'))['total'] or 0
         else:
             # Use the account balance if no date range is specified
             self.balance = self.request.user.account.balance
 
-        return queryset.distinct()
+        return queryset
 
     # Override get_context_data to add additional context variables
     def get_context_data(self, **kwargs):
@@ -167,20 +228,24 @@ class TransactionReportView(LoginRequiredMixin, ListView):
 # Create a view for paying off a loan
 class PayLoanView(LoginRequiredMixin, View):
     def get(self, request, loan_id):
-        loan = get_object_or_404(Transaction, id=loan_id)
-        if loan.loan_approve:
-            user_account = loan.account
-
-            # Check if the user has sufficient balance to pay off the loan
-            if loan.amount < user_account.balance:
-                user_account.balance -= loan.amount
-                loan.balance_after_transactions = user_account.balance
-                user_account.save()
-                loan.loan_approve = True
-                loan.transaction_type = LOAN_PAID
-                loan.save()
-                return redirect('transactions:loan_list')
-            else:
+        with transaction.atomic():
+            # Lock the loan so it can't be paid twice by concurrent requests
+            loan = get_object_or_404(
+                Transaction.objects.select_for_update(),
+                id=loan_id, account=request.user.account)
+            if loan.loan_approve and loan.transaction_type == LOAN:
+                # Debit only if the balance covers the loan, checked by the database
+                paid = UserBankAccount.objects.filter(
+                    pk=loan.account_id, balance__gte=loan.amount).update(
+                    balance=F('balance') - loan.amount)
+                if paid:
+                    Transaction.objects.filter(pk=loan.pk).update(
+                        balance_after_transaction=Subquery(
+                            UserBankAccount.objects.filter(pk=OuterRef('account_id')).values('balance')[:1]),
+                        transaction_type=LOAN_PAID,
+                        loan_approve=False,
+                    )
+                    return redirect('loan_list')
                 messages.error(
                     self.request, f'Loan amount is greater than available balance')
         return redirect('loan_list')
@@ -196,8 +261,10 @@ class LoanListView(LoginRequiredMixin, ListView):
     # Override get_queryset to filter loans for the current user
     def get_queryset(self):
         user_account = self.request.user.account
+        # Plain dicts are enough for the loan table, skip building model instances
         queryset = Transaction.objects.filter(
-            account=user_account, transaction_type=3)
+            account=user_account, transaction_type=3).values(
+            'id', 'amount', 'timestamp', 'loan_approve').order_by('-timestamp')
         return queryset
 
 
@@ -212,31 +279,32 @@ class TransferMoneyView(TransactionCreateMixin):
         return initial
 
     def form_valid(self, form):
-        # Retrieve the amount and receiver's account number from the form.
+        # Retrieve the amount and the receiver's account looked up by the form.
         amount = form.cleaned_data.get('amount')
-        receiver_account = UserBankAccount.objects.get(
-            account_no=form.cleaned_data.get('account_no'))
-
-        # Update the balances of the sender and receiver accounts.
-        self.request.user.account.balance -= amount
-        receiver_account.balance += amount
-        print(receiver_account.account_no)
-
-        # Save the updated balances to the database.
-        receiver_account.save(update_fields=['balance'])
-        self.request.user.account.save(update_fields=['balance'])
-
-        # Send email to sender
-        send_transaction_email(
-            self.request.user, amount, "Transaction Confirmation", "transactions/sender_email.html")
-
-        # Send email to receiver
-        send_transaction_email(receiver_account.user, amount,
-                               "Transaction Received", "transactions/receiver_email.html")
+        amount_str = f'{amount:,.2f}'
+        receiver_account = form.receiver_account
+
+        sender_account = self.request.user.account
+
+        # Update the balances of the sender and receiver accounts in one transaction.
+        if not transfer_balance(sender_account, receiver_account, amount):
+            form.add_error(
+                'amount', 'Transfer could not be completed. Check your balance and the receiver account.')
+            return self.form_invalid(form)
+        sender_account.refresh_from_db(fields=['balance'])
+        receiver_account.refresh_from_db(fields=['balance'])
+
+        # Send emails to sender and receiver over a single connection
+        sender_email = build_transaction_email(
+            self.request.user, amount_str, "Transaction Confirmation", "transactions/sender_email.html")
+        receiver_email = build_transaction_email(
+            receiver_account.user, amount_str, "Transaction Received", "transactions/receiver_email.html")
+        submit_email(get_connection().send_messages,
+                     [sender_email, receiver_email])
 
         messages.success(
             self.request,
-            f'Successfully Transfered {"{:,.2f}".format(float(amount))}$ from your account'
+            f'Successfully Transfered {amount_str}$ from your account'
         )
 
         return super().form_valid(form)